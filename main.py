@@ -5,386 +5,853 @@ A modern web interface for extracting tables and text from PDF files
 and converting them to various formats.
 """
 
-from nicegui import ui, run
-from processor import tables_to_dataframe, convert_to_format, extract_text_from_pdf, convert_text_to_format
-
-# Theme: primary #CD2C58, secondary #FFC69D, dark mode #25343F — no blue; contrast-safe
-ui.add_head_html('''
-<style>
-  :root {
-    --app-primary: #CD2C58;
-    --app-secondary: #FFC69D;
-    --app-dark-bg: #25343F;
-    --app-text-on-primary: #ffffff;
-    --app-text-on-secondary: #1a1a1a;
-    --q-primary: #FFC69D;
-    --q-color-primary: #FFC69D;
-  }
-  .q-btn.bg-primary { --q-primary: #FFC69D; background: #FFC69D !important; color: #1a1a1a !important; }
-  .q-btn.bg-primary .q-btn__content, .q-btn.bg-primary .q-icon { color: #1a1a1a !important; }
-  .app-header { background-color: var(--app-primary) !important; color: var(--app-text-on-primary) !important; }
-  .app-header .q-btn, .app-header .q-btn .q-icon, .app-header .q-btn i { color: var(--app-text-on-primary) !important; }
-  .dark .app-header { background-color: var(--app-dark-bg) !important; color: #f0f0f0 !important; }
-  .dark .app-header .q-btn, .dark .app-header .q-btn .q-icon { color: #f0f0f0 !important; }
-  .app-btn-primary, .app-btn-primary.q-btn, .q-btn.app-btn-primary {
-    background-color: var(--app-secondary) !important;
-    color: var(--app-text-on-secondary) !important;
-  }
-  .app-btn-primary .q-btn__content, .app-btn-primary .q-icon, .app-btn-primary i { color: var(--app-text-on-secondary) !important; }
-  .app-btn-primary:hover { filter: brightness(0.92); }
-  .dark .app-btn-primary, .dark .q-btn.app-btn-primary {
-    background-color: #3d4f5c !important;
-    color: #f0f0f0 !important;
-  }
-  .dark .app-btn-primary .q-btn__content, .dark .app-btn-primary .q-icon { color: #f0f0f0 !important; }
-  .dark .app-btn-primary:hover { filter: brightness(1.15); }
-  .q-card { background-color: #fce8ec !important; }
-  .dark .q-card { background-color: #2f4150 !important; }
-  .dark body, .dark .q-drawer, .dark .q-page, .dark .q-layout,
-  .dark .nicegui-content, .body--dark { background-color: #25343F !important; }
-  .dark .q-field, .dark .q-field__control-container, .dark .q-uploader { background-color: #2f4150 !important; }
-  .dark .q-field__native, .dark .q-field__label, .dark .q-item__label,
-  .dark .q-select__dropdown-icon, .dark .text-grey, .dark .q-uploader__header span { color: #e8e8e8 !important; }
-  .dark .q-card .q-field__native, .dark .q-card .q-field__label,
-  .dark .q-card label, .dark .q-card .q-item__label { color: #e8e8e8 !important; }
-  .dark .q-card .text-grey-7, .dark .q-card .text-grey-8 { color: #c0c0c0 !important; }
-  .q-spinner .path { stroke: #FFC69D !important; }
-  .q-radio__inner--active, .q-radio__inner--active .q-radio__bg,
-  .q-radio .q-radio__inner:not(.q-radio__inner--focused):after,
-  .q-item.q-item--active .q-radio__inner,
-  .q-radio.bg-primary .q-radio__inner, .q-radio .q-radio__inner.bg-primary { color: #FFC69D !important; background: #FFC69D !important; border-color: #FFC69D !important; fill: #FFC69D !important; }
-  .q-radio__inner::before { border-color: #FFC69D !important; }
-  .q-radio--active .q-radio__inner::after { background: #FFC69D !important; }
-  .q-field--focused .q-field__control:after { border-color: #FFC69D !important; }
-  .q-uploader__header {
-    background: #FFC69D !important;
-    color: #1a1a1a !important;
-  }
-  .q-uploader__header .q-icon, .q-uploader__header span { color: #1a1a1a !important; }
-  body .q-btn.bg-primary, body .q-btn[class*="primary"] { background: #FFC69D !important; color: #1a1a1a !important; }
-  .q-card .q-btn:not(.q-btn--flat):not(.q-btn--round),
-  .q-card .q-btn.q-btn--unelevated, .q-card .q-btn.bg-primary { background: #FFC69D !important; color: #1a1a1a !important; }
-  .q-card .q-btn:not(.q-btn--flat) .q-btn__content, .q-card .q-btn:not(.q-btn--flat) .q-icon { color: #1a1a1a !important; }
-  .q-card .q-btn .q-btn__content, .q-card .q-btn .q-icon { color: #1a1a1a !important; }
-  .dark .q-card .q-btn:not(.q-btn--flat):not(.q-btn--round) { background: #3d4f5c !important; color: #f0f0f0 !important; }
-  .dark .q-card .q-btn .q-btn__content, .dark .q-card .q-btn .q-icon { color: #f0f0f0 !important; }
-  html.dark, html body.body--dark { background: #25343F !important; }
-  .dark .text-grey-5, .dark .text-grey-6, .dark .text-grey-7, .dark .text-grey-8 { color: #b8b8b8 !important; }
-</style>
-''')
-
-
-# Global state to track uploaded file and processed data
-uploaded_file_bytes = None
-uploaded_filename = None
-processed_dataframe = None
-processed_text = None
-
-
-async def handle_upload(e):
-    """Handle file upload event."""
-    global uploaded_file_bytes, uploaded_filename, processed_dataframe
+import asyncio
+import contextlib
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from fastapi import Response
+from nicegui import app as nicegui_app, ui
+try:
+    # Installed with NiceGUI, which then also uses it for its websocket messages
+    import orjson
+except ImportError:
+    orjson = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# processor pulls in pdfplumber, pandas, numpy and the export libraries; it is
+# imported by _warm in the background and by the helpers that need it, so the
+# server does not wait for it at startup
+
+
+# Smallest valid one-page PDF, opened once so pdfplumber loads its lazy submodules
+_MINIMAL_PDF = (
+    b'%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>> endobj\n'
+    b'2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>> endobj\n'
+    b'3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 9 9]>> endobj\n'
+    b'xref\n0 4\n0000000000 65535 f \n0000000009 00000 n \n0000000053 00000 n \n0000000103 00000 n \n'
+    b'trailer<</Size 4/Root 1 0 R>>\nstartxref\n163\n%%EOF\n'
+)
+
+
+def _warm():
+    """Pre-import the heavy extraction and export dependencies."""
+    import pdfplumber
+    import processor  # noqa: F401  (also loads pandas, numpy, python-docx and xlsxwriter)
     
-    try:
-        # In NiceGUI 3.0+, use e.file.name and await e.file.read()
-        uploaded_filename = e.file.name
-        uploaded_file_bytes = await e.file.read()
-        
-        # Reset processed data when new file is uploaded
-        processed_dataframe = None
-        processed_text = None
-        preview_table.set_visibility(False)
-        preview_label.set_visibility(False)
-        preview_text.set_visibility(False)
-        preview_text_label.set_visibility(False)
-        download_button.set_visibility(False)
+    with pdfplumber.open(io.BytesIO(_MINIMAL_PDF)) as pdf:
+        pdf.pages[0].extract_tables()
+        pdf.pages[0].extract_text()
+
+
+# Warm the imports in the background so the server starts answering at once.
+# Pool workers are forked from this process on Linux and inherit the modules,
+# so the first extraction waits for this thread (see _run_in_pool) rather than
+# forking while it may hold an import lock.
+_WARM_THREAD = threading.Thread(target=_warm, name='warm-imports', daemon=True)
+_WARM_THREAD.start()
+
+
+# Long-lived worker pool for PDF extraction, so each request does not pay for a
+# fresh worker and its imports. Vercel runs a single process per instance whose
+# imports persist while warm, so a thread pool is used there instead.
+if os.environ.get("VERCEL"):
+    _WORKERS = 1
+    _POOL = ThreadPoolExecutor(max_workers=_WORKERS)
+else:
+    _WORKERS = max(1, (os.cpu_count() or 2) // 2)
+    _POOL = ProcessPoolExecutor(max_workers=_WORKERS, initializer=_warm)
+nicegui_app.on_shutdown(lambda: _POOL.shutdown(wait=False, cancel_futures=True))
+
+
+@nicegui_app.get('/warmup', include_in_schema=False)
+async def _warmup():
+    """Block until the background imports are done; ping after a deploy to pre-warm an instance."""
+    await asyncio.to_thread(_WARM_THREAD.join)
+    return {'status': 'warm'}
+
+
+# PDF header; readers accept it anywhere in the first 1024 bytes
+_PDF_MAGIC = b'%PDF-'
+
+# Counting regex matches avoids building the full list that text.split() would
+_WORD_RE = re.compile(r'\S+')
+
+
+async def _load_processor():
+    """
+    Return the processor module once the warm-up thread has imported it.
+    
+    Importing it on the event loop while the thread is still doing so would
+    block the whole loop on the module's import lock.
+    """
+    if _WARM_THREAD.is_alive():
+        await asyncio.to_thread(_WARM_THREAD.join)
+    import processor
+    return processor
+
+
+async def _run_in_pool(func, *args):
+    """Run a CPU-bound function on the extraction pool without blocking the event loop."""
+    if _WARM_THREAD.is_alive():
+        await asyncio.to_thread(_WARM_THREAD.join)
+    return await asyncio.get_running_loop().run_in_executor(_POOL, func, *args)
+
+
+def _minify_css(css):
+    """
+    Strip comments and insignificant whitespace from a stylesheet.
+    
+    Args:
+        css: Stylesheet source
         
-        # Validate it's a PDF
-        if not uploaded_filename.lower().endswith('.pdf'):
-            upload_status.set_text("Please upload a PDF file.")
-            upload_status.classes('text-red-600')
-            process_button.set_enabled(False)
-            uploaded_file_bytes = None
-            uploaded_filename = None
-            ui.notify("Invalid file type. Please upload a PDF file.", type='negative')
-            return
+    Returns:
+        Minified stylesheet
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,>!])\s*', r'\1', css)
+    return css.replace(';}', '}').strip()
+
+
+# Theme stylesheet, minified once at import and served with long-lived cache
+# headers; the content hash in the URL changes whenever the CSS does
+_STATIC_DIR = Path(__file__).resolve().parent / 'static'
+_MINIFIED_CSS = _minify_css((_STATIC_DIR / 'app.css').read_text(encoding='utf-8'))
+_CSS_VERSION = hashlib.blake2b(_MINIFIED_CSS.encode(), digest_size=4).hexdigest()
+
+
+@nicegui_app.get('/static/app.css', include_in_schema=False)
+def _app_css():
+    return Response(
+        _MINIFIED_CSS,
+        media_type='text/css',
+        headers={'Cache-Control': 'public, max-age=31536000, immutable'},
+    )
+
+
+ui.add_head_html(f'<link rel="stylesheet" href="/static/app.css?v={_CSS_VERSION}">', shared=True)
+
+
+@dataclass(eq=False)
+class Session:
+    """
+    Upload and extraction state of one browser tab.
+    
+    Each page visit gets its own Session, so concurrent users do not overwrite
+    each other's uploads, and a tab's data is released when its client is deleted.
+    The upload is kept in a temp file so workers receive its path instead of
+    the pickled PDF bytes, and extracted text is kept in a temp file rather
+    than in memory until it is downloaded.
+    """
+    file_path: str | None = None
+    filename: str | None = None
+    # Filename without its extension, the base name of every download
+    stem: str | None = None
+    digest: bytes | None = None
+    # Digest of the upload the current dataframe or text was extracted from
+    result_digest: bytes | None = None
+    dataframe: 'pd.DataFrame | None' = None
+    text_path: str | None = None
+    # Extraction started speculatively, with its mode and the upload file it reads
+    pending_task: asyncio.Task | None = None
+    pending_mode: str | None = None
+    pending_path: str | None = None
+    # Number of the latest process_pdf run, which owns the spinner and status
+    process_run: int = 0
+    # Number of the latest handle_upload call; an older one still reading or
+    # writing its file when another upload starts gives up
+    upload_run: int = 0
+
+
+@dataclass(frozen=True)
+class TextResult:
+    """Extracted text spilled to a UTF-8 temp file, with what the page shows about it."""
+    path: str | None
+    preview: str
+    char_count: int
+    word_count: int
+
+
+# Sessions of open tabs, so their temp files can be removed at shutdown
+_sessions = set()
+
+# Bounded LRU caches keyed by the PDF's content hash, so re-processing the same
+# file or re-downloading the same format skips extraction and conversion.
+# Text results and download entries refer to temp files, deleted when evicted
+# (text files only once no open tab still uses them).
+_CACHE_SIZE = 8
+_result_cache = OrderedDict()
+_download_cache = OrderedDict()
+
+
+def _cache_get(cache, key):
+    """Return a cached value (marking it most recently used), or None on a miss."""
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache, key, value):
+    """
+    Store a value, evicting the least recently used entry beyond _CACHE_SIZE.
+    
+    Returns:
+        The evicted value, or None if nothing was evicted
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > _CACHE_SIZE:
+        return cache.popitem(last=False)[1]
+    return None
+
+
+def _write_temp_file(data, suffix):
+    """Write bytes (or any buffer) to a new temp file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        tmp.write(data)
+    return tmp.name
+
+
+def _convert_to_temp_file(convert, data, output_format, suffix):
+    """Run a converter straight into a new temp file and return its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            convert(data, output_format, tmp)
+        except Exception:
+            tmp.close()
+            _remove_file(tmp.name)
+            raise
+    return tmp.name
+
+
+def _remove_file(path):
+    """Delete a temp file, ignoring a missing path."""
+    if path:
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+
+
+def _spill_text(text):
+    """
+    Write extracted text to a temp file and summarize it for the page.
+    
+    Args:
+        text: Extracted text
         
-        upload_status.set_text(f"✓ File uploaded: {uploaded_filename}")
-        upload_status.classes('text-gray-800 dark:text-gray-200')
-        process_button.set_enabled(True)
-        ui.notify(f"File '{uploaded_filename}' uploaded successfully!", type='positive', timeout=2000)
+    Returns:
+        TextResult whose path is None when the text is empty
+    """
+    if not text or not text.strip():
+        return TextResult(None, '', 0, 0)
+    
+    # Show preview text (first 1000 characters)
+    preview = text[:1001]
+    if len(preview) > 1000:
+        preview = preview[:1000] + '...'
+    word_count = sum(1 for _ in _WORD_RE.finditer(text))
+    # The file holds exactly the TXT download, so it can be served as is
+    path = _write_temp_file(text.encode('utf-8'), '.txt')
+    return TextResult(path, preview, len(text), word_count)
+
+
+def _release_text_file(path):
+    """Delete a text result file once neither the cache nor an open tab refers to it."""
+    if path is None:
+        return
+    if any(isinstance(r, TextResult) and r.path == path for r in _result_cache.values()):
+        return
+    if any(s.text_path == path for s in _sessions):
+        return
+    _remove_file(path)
+
+
+def _store_result(key, value):
+    """Cache an extraction result, releasing the text file of an evicted one."""
+    evicted = _cache_put(_result_cache, key, value)
+    if isinstance(evicted, TextResult):
+        _release_text_file(evicted.path)
+
+
+def _set_text(session, path):
+    """Point the session at a text result file, releasing the one it held before."""
+    previous = session.text_path
+    session.text_path = path
+    if previous != path:
+        _release_text_file(previous)
+
+
+def _clear_temp_files():
+    """Delete all cached download and text result files."""
+    while _download_cache:
+        _remove_file(_download_cache.popitem()[1])
+    while _result_cache:
+        result = _result_cache.popitem()[1]
+        if isinstance(result, TextResult):
+            _remove_file(result.path)
+
+
+nicegui_app.on_shutdown(_clear_temp_files)
+
+
+def _plain_rows(rows):
+    """
+    Normalize table rows to plain JSON values in one orjson round trip.
+    
+    numpy scalars become Python numbers and NaN becomes None, so NiceGUI
+    sends the rows without any per-value conversion.
+    
+    Args:
+        rows: List of row dicts
         
-    except Exception as ex:
-        uploaded_file_bytes = None
-        uploaded_filename = None
-        processed_dataframe = None
-        upload_status.set_text(f"Upload error: {str(ex)}")
-        upload_status.classes('text-red-600 dark:text-red-400')
-        process_button.set_enabled(False)
-        ui.notify(f"Upload failed: {str(ex)}", type='negative')
+    Returns:
+        List of row dicts holding only JSON types (the input rows if orjson is unavailable)
+    """
+    if orjson is None:
+        return rows
+    return orjson.loads(orjson.dumps(rows, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS))
+
+
+# File extension of each download format
+_EXTENSIONS = {'csv': '.csv', 'excel': '.xlsx', 'txt': '.txt', 'docx': '.docx'}
+
+# Smaller page ranges are not worth re-opening the PDF in another worker
+_MIN_PAGES_PER_CHUNK = 4
 
 
-async def process_pdf():
-    """Process the uploaded PDF asynchronously."""
-    global uploaded_file_bytes, uploaded_filename, processed_dataframe, processed_text
+def _page_ranges(n_pages):
+    """Split a document's pages into up to _WORKERS contiguous (start, stop) ranges."""
+    n_chunks = max(1, min(_WORKERS, n_pages // _MIN_PAGES_PER_CHUNK))
+    bounds = [n_pages * i // n_chunks for i in range(n_chunks + 1)]
+    return list(zip(bounds, bounds[1:]))
+
+
+async def _extract_tables(path):
+    """Extract the tables of a PDF, fanning page ranges out across the pool."""
+    processor = await _load_processor()
+    
+    if _WORKERS == 1:
+        return await _run_in_pool(processor.tables_to_dataframe_path, path)
     
-    if not uploaded_file_bytes:
-        ui.notify("Please upload a PDF file first.", type='negative')
+    ranges = _page_ranges(await _run_in_pool(processor.count_pages_path, path))
+    if len(ranges) == 1:
+        return await _run_in_pool(processor.tables_to_dataframe_path, path)
+    
+    chunks = await asyncio.gather(
+        *(_run_in_pool(processor.table_frames_path, path, start, stop) for start, stop in ranges)
+    )
+    return await asyncio.to_thread(processor.merge_tables, list(chain.from_iterable(chunks)))
+
+
+async def _extract_text(path):
+    """Extract the text of a PDF, fanning page ranges out across the pool."""
+    processor = await _load_processor()
+    
+    if _WORKERS == 1:
+        return await _run_in_pool(processor.extract_text_from_pdf_path, path)
+    
+    ranges = _page_ranges(await _run_in_pool(processor.count_pages_path, path))
+    if len(ranges) == 1:
+        return await _run_in_pool(processor.extract_text_from_pdf_path, path)
+    
+    chunks = await asyncio.gather(
+        *(_run_in_pool(processor.text_pages_path, path, start, stop) for start, stop in ranges)
+    )
+    return processor.join_text_pages(chunks)
+
+
+_EXTRACTORS = {'tables': _extract_tables, 'text': _extract_text}
+
+
+def _cancel_pending(session):
+    """Cancel the session's speculative extraction, if one is running."""
+    if session.pending_task is not None:
+        # A job already running in a worker process still completes; its result is dropped
+        session.pending_task.cancel()
+    session.pending_task = None
+    session.pending_mode = None
+    session.pending_path = None
+
+
+def _is_pending(session, mode):
+    """Whether the session's speculative extraction is for mode and its current upload."""
+    return (
+        session.pending_task is not None
+        and session.pending_mode == mode
+        and session.pending_path == session.file_path
+    )
+
+
+def _start_extraction(session, mode):
+    """Start extracting the session's upload in the given mode ahead of the user's click."""
+    if _is_pending(session, mode) or (session.digest, mode) in _result_cache:
         return
     
-    # Get extraction mode
-    extraction_mode = mode_selector.value.lower()
+    _cancel_pending(session)
+    session.pending_task = asyncio.create_task(_EXTRACTORS[mode](session.file_path))
+    # Mark failures as retrieved; they are re-raised when process_pdf awaits the task
+    session.pending_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+    session.pending_mode = mode
+    session.pending_path = session.file_path
+
+
+async def _take_extraction(session, mode):
+    """Await the speculative extraction for mode, starting it first if needed."""
+    if not _is_pending(session, mode):
+        _cancel_pending(session)
+        session.pending_task = asyncio.create_task(_EXTRACTORS[mode](session.file_path))
+    
+    task = session.pending_task
+    session.pending_task = None
+    session.pending_mode = None
+    session.pending_path = None
+    return await task
+
+
+def _discard_upload(session):
+    """Delete the temp file holding the session's upload, if any."""
+    _cancel_pending(session)
+    _remove_file(session.file_path)
+    session.file_path = None
+
+
+def _close_session(session):
+    """Release a closed tab's upload and results."""
+    _discard_upload(session)
+    session.dataframe = None
+    session.result_digest = None
+    _sessions.discard(session)
+    _set_text(session, None)
+
+
+def _close_all_sessions():
+    """Release the uploads of all open tabs."""
+    for session in list(_sessions):
+        _close_session(session)
+
+
+nicegui_app.on_shutdown(_close_all_sessions)
+
+
+@ui.page('/')
+def index():
+    """Build the extractor page; every visit gets its own Session."""
+    session = Session()
+    _sessions.add(session)
+    ui.context.client.on_delete(lambda: _close_session(session))
+    
+    def hide_results():
+        """Hide the previews and download button by hiding their shared container."""
+        results_container.set_visibility(False)
     
-    # Show loading spinner
-    spinner.set_visibility(True)
-    process_button.set_enabled(False)
-    status_label.set_text("Processing PDF...")
-    status_label.classes('text-gray-800 dark:text-gray-200')
-    preview_table.set_visibility(False)
-    preview_label.set_visibility(False)
-    preview_text.set_visibility(False)
-    preview_text_label.set_visibility(False)
-    download_button.set_visibility(False)
+    def show_results(mode):
+        """Show the preview for the given extraction mode along with the download button."""
+        is_tables = mode == 'tables'
+        preview_table.set_visibility(is_tables)
+        preview_label.set_visibility(is_tables)
+        preview_text.set_visibility(not is_tables)
+        preview_text_label.set_visibility(not is_tables)
+        results_container.set_visibility(True)
     
-    try:
-        if extraction_mode == 'tables':
-            # Extract tables
-            df = await run.cpu_bound(tables_to_dataframe, uploaded_file_bytes)
+    def on_mode_change(e):
+        """Restart the speculative extraction when the user switches extraction mode."""
+        if session.file_path:
+            _start_extraction(session, e.value.lower())
+    
+    def reject_upload(message):
+        """Show an upload as rejected and keep processing disabled."""
+        upload_status.set_text("Please upload a PDF file.")
+        upload_status.classes('text-red-600')
+        process_button.set_enabled(False)
+        ui.notify(message, type='negative')
+    
+    async def handle_upload(e):
+        """Handle file upload event."""
+        session.upload_run += 1
+        run = session.upload_run
+        file_path = None
+        
+        try:
+            # Drop the previous upload's temp file before taking the new one
+            _discard_upload(session)
+            
+            # Reset processed data when new file is uploaded
+            session.filename = None
+            session.stem = None
+            session.digest = None
+            session.result_digest = None
+            session.dataframe = None
+            _set_text(session, None)
+            hide_results()
             
-            if df.empty:
-                spinner.set_visibility(False)
-                process_button.set_enabled(True)
-                status_label.set_text("No tables found in the PDF.")
-                status_label.classes('text-yellow-600 dark:text-yellow-400')
-                ui.notify("No tables detected in the PDF file.", type='warning', timeout=3000)
-                processed_dataframe = None
+            # Validate it's a PDF by name before reading the upload at all
+            if not e.file.name.lower().endswith('.pdf'):
+                reject_upload("Invalid file type. Please upload a PDF file.")
                 return
             
-            # Store the processed dataframe
-            processed_dataframe = df
-            processed_text = None
+            # In NiceGUI 3.0+, use e.file.name and await e.file.read()
+            file_bytes = await e.file.read()
+            if session.upload_run != run:
+                return
             
-            # Show preview table with first 5 rows
-            preview_rows = df.head(5)
-            preview_table.rows = preview_rows.to_dict('records')
-            preview_table.columns = [{'name': col, 'label': col, 'field': col} for col in df.columns]
-            preview_table.set_visibility(True)
-            preview_label.set_visibility(True)
+            # Check the PDF header so renamed files never reach pdfplumber
+            if _PDF_MAGIC not in file_bytes[:1024]:
+                reject_upload("This file is not a valid PDF.")
+                return
             
-            # Update format selector for tables
-            format_selector.options = ['CSV', 'Excel']
-            if format_selector.value not in ['CSV', 'Excel']:
-                format_selector.set_value('CSV')
+            digest = hashlib.blake2b(file_bytes, digest_size=16).digest()
+            file_path = await asyncio.to_thread(_write_temp_file, file_bytes, '.pdf')
+            if session.upload_run != run:
+                # A newer upload took over while the file was being written
+                _remove_file(file_path)
+                return
             
-            # Update status
-            status_label.set_text(f"✓ Successfully extracted {len(df)} rows from {len(df.columns)} columns")
-            status_label.classes('text-gray-800 dark:text-gray-200')
-            ui.notify(
-                f"Successfully extracted {len(df)} rows! Preview shown below.",
-                type='positive',
-                timeout=3000
-            )
+            # Take the upload over in one step, so its name, digest and file always match
+            session.filename = e.file.name
+            session.stem = session.filename.rsplit('.', 1)[0]
+            session.digest = digest
+            session.file_path = file_path
+            _start_extraction(session, mode_selector.value.lower())
             
-        else:  # text extraction
-            # Extract text
-            text = await run.cpu_bound(extract_text_from_pdf, uploaded_file_bytes)
+            upload_status.set_text(f"✓ File uploaded: {session.filename}")
+            upload_status.classes('text-gray-800 dark:text-gray-200')
+            process_button.set_enabled(True)
+            ui.notify(f"File '{session.filename}' uploaded successfully!", type='positive', timeout=2000)
             
-            if not text or not text.strip():
-                spinner.set_visibility(False)
-                process_button.set_enabled(True)
-                status_label.set_text("No text found in the PDF.")
-                status_label.classes('text-yellow-600 dark:text-yellow-400')
-                ui.notify("No text detected in the PDF file.", type='warning', timeout=3000)
-                processed_text = None
+        except Exception as ex:
+            if session.upload_run != run:
+                _remove_file(file_path)
                 return
+            _discard_upload(session)
+            session.filename = None
+            session.stem = None
+            session.digest = None
+            session.result_digest = None
+            session.dataframe = None
+            upload_status.set_text(f"Upload error: {str(ex)}")
+            upload_status.classes('text-red-600 dark:text-red-400')
+            process_button.set_enabled(False)
+            ui.notify(f"Upload failed: {str(ex)}", type='negative')
+    
+    def drop_stale_result(run):
+        """Stop showing progress for a file that was replaced while it was being processed."""
+        # The result is still cached under its own file's digest; the page now
+        # belongs to the newer upload, so nothing is shown or stored for it
+        if session.process_run == run:
+            spinner.set_visibility(False)
+            status_label.set_text('')
+    
+    async def process_pdf():
+        """Process the uploaded PDF asynchronously."""
+        if not session.file_path:
+            ui.notify("Please upload a PDF file first.", type='negative')
+            return
+        
+        # Get extraction mode
+        extraction_mode = mode_selector.value.lower()
+        # Uploads stay possible while extracting, so remember which file this is
+        digest = session.digest
+        session.process_run += 1
+        run = session.process_run
+        
+        # Show loading spinner
+        spinner.set_visibility(True)
+        process_button.set_enabled(False)
+        status_label.set_text("Processing PDF...")
+        status_label.classes('text-gray-800 dark:text-gray-200')
+        hide_results()
+        
+        try:
+            if extraction_mode == 'tables':
+                # Extract tables (reusing a previous result for the same PDF)
+                cache_key = (digest, extraction_mode)
+                df = _cache_get(_result_cache, cache_key)
+                if df is None:
+                    df = await _take_extraction(session, extraction_mode)
+                    _store_result(cache_key, df)
+                
+                if session.digest != digest:
+                    drop_stale_result(run)
+                    return
+                
+                n_rows, n_cols = df.shape
+                cols = df.columns.tolist()
+                
+                if n_rows == 0 or n_cols == 0:
+                    spinner.set_visibility(False)
+                    process_button.set_enabled(True)
+                    status_label.set_text("No tables found in the PDF.")
+                    status_label.classes('text-yellow-600 dark:text-yellow-400')
+                    ui.notify("No tables detected in the PDF file.", type='warning', timeout=3000)
+                    session.dataframe = None
+                    return
+                
+                # Store the processed dataframe
+                session.dataframe = df
+                session.result_digest = digest
+                _set_text(session, None)
+                
+                # Show preview table with first 5 rows; plain tuples avoid
+                # to_dict('records') boxing, and both props go out in one update
+                preview_rows = df.iloc[:5]
+                preview_table.columns = [{'name': col, 'label': col, 'field': col} for col in cols]
+                preview_table.rows = _plain_rows(
+                    [dict(zip(cols, row)) for row in preview_rows.itertuples(index=False, name=None)]
+                )
+                
+                # Update format selector for tables
+                format_selector.options = ['CSV', 'Excel']
+                if format_selector.value not in ['CSV', 'Excel']:
+                    format_selector.set_value('CSV')
+                
+                # Update status
+                status_label.set_text(f"✓ Successfully extracted {n_rows} rows from {n_cols} columns")
+                status_label.classes('text-gray-800 dark:text-gray-200')
+                ui.notify(
+                    f"Successfully extracted {n_rows} rows! Preview shown below.",
+                    type='positive',
+                    timeout=3000
+                )
+                
+            else:  # text extraction
+                # Extract text (reusing a previous result for the same PDF)
+                cache_key = (digest, extraction_mode)
+                result = _cache_get(_result_cache, cache_key)
+                if result is None:
+                    text = await _take_extraction(session, extraction_mode)
+                    # Only the file, preview and counts outlive this call, so the
+                    # full text is not kept in memory until it is downloaded
+                    result = await asyncio.to_thread(_spill_text, text)
+                    del text
+                    _store_result(cache_key, result)
+                
+                if session.digest != digest:
+                    drop_stale_result(run)
+                    return
+                
+                if result.path is None:
+                    spinner.set_visibility(False)
+                    process_button.set_enabled(True)
+                    status_label.set_text("No text found in the PDF.")
+                    status_label.classes('text-yellow-600 dark:text-yellow-400')
+                    ui.notify("No text detected in the PDF file.", type='warning', timeout=3000)
+                    _set_text(session, None)
+                    return
+                
+                # Store the processed text's file
+                _set_text(session, result.path)
+                session.dataframe = None
+                session.result_digest = digest
+                
+                preview_text.set_value(result.preview)
+                
+                # Update format selector for text
+                format_selector.options = ['TXT', 'DOCX']
+                if format_selector.value not in ['TXT', 'DOCX']:
+                    format_selector.set_value('TXT')
+                
+                # Update status
+                status_label.set_text(
+                    f"✓ Successfully extracted {result.word_count:,} words ({result.char_count:,} characters)"
+                )
+                status_label.classes('text-gray-800 dark:text-gray-200')
+                ui.notify(
+                    f"Successfully extracted text! Preview shown below.",
+                    type='positive',
+                    timeout=3000
+                )
             
-            # Store the processed text
-            processed_text = text
-            processed_dataframe = None
+            # Show the preview and download button
+            show_results(extraction_mode)
+            spinner.set_visibility(False)
+            process_button.set_enabled(True)
             
-            # Show preview text (first 1000 characters)
-            preview_content = text[:1000] + ('...' if len(text) > 1000 else '')
-            preview_text.set_value(preview_content)
-            preview_text.set_visibility(True)
-            preview_text_label.set_visibility(True)
+        except Exception as e:
+            if session.digest != digest:
+                drop_stale_result(run)
+                return
+            spinner.set_visibility(False)
+            process_button.set_enabled(True)
+            status_label.set_text(f"Error: {str(e)}")
+            status_label.classes('text-red-600 dark:text-red-400')
+            hide_results()
+            session.dataframe = None
+            session.result_digest = None
+            _set_text(session, None)
+            ui.notify(f"Error processing PDF: {str(e)}", type='negative', timeout=5000)
+    
+    def download_file():
+        """Download the processed file in the selected format."""
+        # Already loaded by the extraction that produced the data
+        from processor import convert_to_format, convert_text_to_format
+        
+        # Get selected format
+        selected_format = format_selector.value.lower()
+        
+        try:
+            if session.dataframe is not None and not session.dataframe.empty:
+                # Download table data
+                file_extension = _EXTENSIONS[selected_format]
+                cache_key = (session.result_digest, 'tables', selected_format)
+                output_path = _cache_get(_download_cache, cache_key)
+                if output_path is None:
+                    output_path = _convert_to_temp_file(
+                        convert_to_format, session.dataframe, selected_format, file_extension
+                    )
+                    _remove_file(_cache_put(_download_cache, cache_key, output_path))
+                output_filename = session.stem + file_extension
+                
+            elif session.text_path is not None:
+                # Download text data; the text file already is the TXT download
+                file_extension = _EXTENSIONS[selected_format]
+                cache_key = (session.result_digest, 'text', selected_format)
+                if selected_format == 'txt':
+                    output_path = session.text_path
+                else:
+                    output_path = _cache_get(_download_cache, cache_key)
+                if output_path is None:
+                    with open(session.text_path, encoding='utf-8', newline='') as f:
+                        text = f.read()
+                    output_path = _convert_to_temp_file(convert_text_to_format, text, selected_format, file_extension)
+                    _remove_file(_cache_put(_download_cache, cache_key, output_path))
+                output_filename = session.stem + file_extension
+                
+            else:
+                ui.notify("No data to download. Please process the PDF first.", type='warning')
+                return
             
-            # Update format selector for text
-            format_selector.options = ['TXT', 'DOCX']
-            if format_selector.value not in ['TXT', 'DOCX']:
-                format_selector.set_value('TXT')
+            # Trigger download; the file is streamed from disk rather than sent as bytes
+            ui.download.file(output_path, filename=output_filename)
             
-            # Update status
-            char_count = len(text)
-            word_count = len(text.split())
-            status_label.set_text(f"✓ Successfully extracted {word_count:,} words ({char_count:,} characters)")
-            status_label.classes('text-gray-800 dark:text-gray-200')
             ui.notify(
-                f"Successfully extracted text! Preview shown below.",
+                f"Download started: {output_filename}",
                 type='positive',
-                timeout=3000
+                timeout=2000
             )
-        
-        # Show download button
-        download_button.set_visibility(True)
-        spinner.set_visibility(False)
-        process_button.set_enabled(True)
-        
-    except Exception as e:
-        spinner.set_visibility(False)
-        process_button.set_enabled(True)
-        status_label.set_text(f"Error: {str(e)}")
-        status_label.classes('text-red-600 dark:text-red-400')
-        preview_table.set_visibility(False)
-        preview_label.set_visibility(False)
-        preview_text.set_visibility(False)
-        preview_text_label.set_visibility(False)
-        download_button.set_visibility(False)
-        processed_dataframe = None
-        processed_text = None
-        ui.notify(f"Error processing PDF: {str(e)}", type='negative', timeout=5000)
-
-
-def download_file():
-    """Download the processed file in the selected format."""
-    global processed_dataframe, processed_text, uploaded_filename
-    
-    # Get selected format
-    selected_format = format_selector.value.lower()
+            
+        except Exception as e:
+            ui.notify(f"Error creating download file: {str(e)}", type='negative', timeout=5000)
     
-    try:
-        if processed_dataframe is not None and not processed_dataframe.empty:
-            # Download table data
-            output_stream = convert_to_format(processed_dataframe, selected_format)
-            file_extension = '.csv' if selected_format == 'csv' else '.xlsx'
-            output_filename = uploaded_filename.rsplit('.', 1)[0] + file_extension
+    # Create the UI
+    dark_mode = ui.dark_mode()
+    with ui.header().classes('app-header p-4'):
+        with ui.row().classes('w-full items-center justify-between'):
+            ui.label('PDF Extractor').classes('text-2xl font-bold')
             
-        elif processed_text is not None and processed_text.strip():
-            # Download text data
-            output_stream = convert_text_to_format(processed_text, selected_format)
-            file_extension = '.txt' if selected_format == 'txt' else '.docx'
-            output_filename = uploaded_filename.rsplit('.', 1)[0] + file_extension
+            def toggle_dark_mode():
+                dark_mode.toggle()
+                ui.notify(
+                    f"Switched to {'light' if dark_mode.value else 'dark'} mode",
+                    type='info',
+                    timeout=1500
+                )
             
-        else:
-            ui.notify("No data to download. Please process the PDF first.", type='warning')
-            return
+            ui.button(icon='dark_mode', on_click=toggle_dark_mode).props('flat round')
+    
+    with ui.card().classes('w-full max-w-4xl mx-auto mt-6 p-8 shadow-lg'):
+        # Title
+        ui.label('PDF Extractor').classes('text-3xl font-bold text-center mb-2')
+        
+        # Description
+        ui.label('Upload a PDF file to extract tables or text and convert them to various formats.').classes(
+            'text-gray-600 dark:text-gray-300 text-center mb-6'
+        )
+        
+        # Extraction mode selector
+        ui.label('Extraction Mode').classes('text-lg font-semibold mb-2')
         
-        # Get the bytes from the stream
-        output_bytes = output_stream.getvalue()
+        mode_selector = ui.radio(
+            ['Tables', 'Text'],
+            value='Tables',
+            on_change=on_mode_change
+        ).props('inline').classes('mb-4')
         
-        # Trigger download
-        ui.download(output_bytes, filename=output_filename)
+        # File upload area
+        ui.label('Upload PDF File').classes('text-lg font-semibold mb-2')
         
-        ui.notify(
-            f"Download started: {output_filename}",
-            type='positive',
-            timeout=2000
+        upload = ui.upload(
+            on_upload=handle_upload,
+            auto_upload=True,
+            max_file_size=50 * 1024 * 1024  # 50MB limit
+        ).props('accept=".pdf"').classes('w-full')
+        
+        upload_status = ui.label('No file uploaded').classes('text-gray-500 dark:text-gray-400 text-sm mt-2')
+        
+        # Format selector
+        ui.label('Output Format').classes('text-lg font-semibold mb-2 mt-6')
+        
+        format_selector = ui.select(
+            ['CSV', 'Excel'],
+            value='CSV',
+            label='Select format'
+        ).classes('mb-4')
+        
+        # Process button
+        process_button = ui.button(
+            'Process PDF',
+            on_click=process_pdf
+        ).classes('w-full mt-4 app-btn-primary font-semibold py-3 rounded-lg').style(
+            'background-color: #FFC69D !important; color: #1a1a1a !important;'
         )
+        process_button.set_enabled(False)
         
-    except Exception as e:
-        ui.notify(f"Error creating download file: {str(e)}", type='negative', timeout=5000)
-
-
-# Create the UI
-dark_mode = ui.dark_mode()
-with ui.header().classes('app-header p-4'):
-    with ui.row().classes('w-full items-center justify-between'):
-        ui.label('PDF Extractor').classes('text-2xl font-bold')
+        # Status area with spinner
+        with ui.row().classes('w-full mt-4 items-center justify-center'):
+            spinner = ui.spinner(size='lg', color='primary')
+            spinner.set_visibility(False)
+            status_label = ui.label('').classes('ml-3')
         
-        def toggle_dark_mode():
-            dark_mode.toggle()
-            ui.notify(
-                f"Switched to {'light' if dark_mode.value else 'dark'} mode",
-                type='info',
-                timeout=1500
+        # Previews and download button share one container so they can be hidden together
+        with ui.column().classes('w-full') as results_container:
+            # Preview table (initially hidden)
+            preview_table = ui.table(
+                rows=[],
+                columns=[],
+                row_key='id'
+            ).classes('w-full mt-2').style('max-height: 300px;')
+            # Virtual scrolling renders only visible cells, which matters for wide tables
+            preview_table.props('virtual-scroll dense :rows-per-page-options="[0]"')
+            preview_table.set_visibility(False)
+            
+            preview_label = ui.label('Preview (First 5 rows)').classes('text-lg font-semibold mb-2 mt-6')
+            preview_label.set_visibility(False)
+            
+            # Preview text (initially hidden)
+            preview_text_label = ui.label('Preview (First 1000 characters)').classes('text-lg font-semibold mb-2 mt-6')
+            preview_text_label.set_visibility(False)
+            
+            preview_text = ui.textarea('').classes('w-full mt-2').style('min-height: 200px; max-height: 300px;')
+            preview_text.set_visibility(False)
+            preview_text.props('readonly')
+            
+            # Download button
+            download_button = ui.button(
+                'Download',
+                on_click=download_file,
+                icon='download'
+            ).classes('w-full mt-4 app-btn-primary font-semibold py-3 rounded-lg').style(
+                'background-color: #FFC69D !important; color: #1a1a1a !important;'
             )
+        results_container.set_visibility(False)
         
-        ui.button(icon='dark_mode', on_click=toggle_dark_mode).props('flat round')
+        # Footer note
+        ui.label('Uploads are only kept in temporary files while you work with them. Nothing is stored permanently.').classes(
+            'text-xs text-gray-400 dark:text-gray-500 text-center mt-6'
+        )
 
-with ui.card().classes('w-full max-w-4xl mx-auto mt-6 p-8 shadow-lg'):
-    # Title
-    ui.label('PDF Extractor').classes('text-3xl font-bold text-center mb-2')
-    
-    # Description
-    ui.label('Upload a PDF file to extract tables or text and convert them to various formats.').classes(
-        'text-gray-600 dark:text-gray-300 text-center mb-6'
-    )
-    
-    # Extraction mode selector
-    ui.label('Extraction Mode').classes('text-lg font-semibold mb-2')
-    
-    mode_selector = ui.radio(
-        ['Tables', 'Text'],
-        value='Tables'
-    ).props('inline').classes('mb-4')
-    
-    # File upload area
-    ui.label('Upload PDF File').classes('text-lg font-semibold mb-2')
-    
-    upload = ui.upload(
-        on_upload=handle_upload,
-        auto_upload=True,
-        max_file_size=50 * 1024 * 1024  # 50MB limit
-    ).props('accept=".pdf"').classes('w-full')
-    
-    upload_status = ui.label('No file uploaded').classes('text-gray-500 dark:text-gray-400 text-sm mt-2')
-    
-    # Format selector
-    ui.label('Output Format').classes('text-lg font-semibold mb-2 mt-6')
-    
-    format_selector = ui.select(
-        ['CSV', 'Excel'],
-        value='CSV',
-        label='Select format'
-    ).classes('mb-4')
-    
-    # Process button
-    process_button = ui.button(
-        'Process PDF',
-        on_click=process_pdf
-    ).classes('w-full mt-4 app-btn-primary font-semibold py-3 rounded-lg').style(
-        'background-color: #FFC69D !important; color: #1a1a1a !important;'
-    )
-    process_button.set_enabled(False)
-    
-    # Status area with spinner
-    with ui.row().classes('w-full mt-4 items-center justify-center'):
-        spinner = ui.spinner(size='lg', color='primary')
-        spinner.set_visibility(False)
-        status_label = ui.label('').classes('ml-3')
-    
-    # Preview table (initially hidden)
-    preview_table = ui.table(
-        rows=[],
-        columns=[],
-        row_key='id'
-    ).classes('w-full mt-2').style('max-height: 300px;')
-    preview_table.set_visibility(False)
-    
-    preview_label = ui.label('Preview (First 5 rows)').classes('text-lg font-semibold mb-2 mt-6')
-    preview_label.set_visibility(False)
-    
-    # Preview text (initially hidden)
-    preview_text_label = ui.label('Preview (First 1000 characters)').classes('text-lg font-semibold mb-2 mt-6')
-    preview_text_label.set_visibility(False)
-    
-    preview_text = ui.textarea('').classes('w-full mt-2').style('min-height: 200px; max-height: 300px;')
-    preview_text.set_visibility(False)
-    preview_text.props('readonly')
-    
-    # Download button (initially hidden)
-    download_button = ui.button(
-        'Download',
-        on_click=download_file,
-        icon='download'
-    ).classes('w-full mt-4 app-btn-primary font-semibold py-3 rounded-lg').style(
-        'background-color: #FFC69D !important; color: #1a1a1a !important;'
-    )
-    download_button.set_visibility(False)
-    
-    # Footer note
-    ui.label('All processing is done in-memory. No files are stored on the server.').classes(
-        'text-xs text-gray-400 dark:text-gray-500 text-center mt-6'
-    )
 
 # Expose ASGI app for Vercel; use NiceGUI default server when run locally
 if __name__ in {"__main__", "__mp_main__"}:
@@ -392,7 +859,6 @@ if __name__ in {"__main__", "__mp_main__"}:
     ui.run(title="PDF Extractor", port=8080, dark=None)
 else:
     # Vercel: mount at /api; Railway/Render: mount at / so uvicorn main:app works
-    import os
     from fastapi import FastAPI
     app = FastAPI()
     mount_path = "/api" if os.environ.get("VERCEL") else "/"
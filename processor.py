@@ -1,14 +1,39 @@
 """
 PDF Table Extraction Processor Module
 
-This module provides stateless PDF table extraction functionality.
-All operations are performed in-memory without disk I/O.
+This module provides stateless PDF table and text extraction and format
+conversion. PDFs are read either from bytes in memory or from files on disk,
+which are memory-mapped rather than read; conversions write into the given
+stream, and Excel export through xlsxwriter may use temp files while it runs.
 """
 
 import io
+import mmap
+import os
 import re
+from contextlib import contextmanager
+from itertools import chain
+
+import numpy as np
 import pandas as pd
 import pdfplumber
+from pdfplumber.table import TableSettings
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    from docx import Document
+    from docx.shared import Pt
+except ImportError:
+    Document = None
 
 
 def _make_unique_columns(columns):
@@ -18,121 +43,202 @@ def _make_unique_columns(columns):
     for col in columns:
         # Convert None to empty string
         col = str(col).strip() if col is not None else ''
-        if col in seen:
-            seen[col] += 1
-            result.append(f"{col}_{seen[col]}")
-        else:
-            seen[col] = 0
-            result.append(col)
+        # Occurrences so far: 0 for the first, so only repeats get a suffix
+        count = seen.get(col, -1) + 1
+        seen[col] = count
+        result.append(col if count == 0 else f"{col}_{count}")
     return result
 
 
-def _count_non_empty_cells(row):
-    """Count non-empty cells in a row."""
-    count = 0
-    for cell in row:
-        if cell is not None and str(cell).strip():
-            count += 1
-    return count
+def _build_mask(table):
+    """
+    Compute which cells of a table are non-empty.
+    
+    Each cell is stringified and stripped exactly once; counts and column
+    usage are then vectorized reductions over the mask. Short rows are
+    padded with False.
+    
+    Args:
+        table: List of rows (each row is a list of cells)
+        
+    Returns:
+        Boolean ndarray of shape (rows, widest row)
+    """
+    max_cols = max((len(row) for row in table), default=0)
+    flags = [[cell is not None and bool(str(cell).strip()) for cell in row] for row in table]
+    
+    if all(len(row) == max_cols for row in flags):
+        return np.array(flags, dtype=bool).reshape(len(flags), max_cols)
+    
+    mask = np.zeros((len(flags), max_cols), dtype=bool)
+    for i, row in enumerate(flags):
+        mask[i, :len(row)] = row
+    return mask
 
 
-def _get_non_empty_indices(row):
-    """Get indices of non-empty cells in a row."""
-    indices = []
-    for i, cell in enumerate(row):
-        if cell is not None and str(cell).strip():
-            indices.append(i)
-    return indices
+def _column_fill_counts(mask, start=0):
+    """
+    Count the non-empty cells of each column of a table, from a given row down.
+    
+    Args:
+        mask: Boolean ndarray as returned by _build_mask
+        start: Index of the first row to count
+        
+    Returns:
+        Integer ndarray with one count per column
+    """
+    return mask[start:].sum(axis=0)
 
 
-def _find_table_structure(table):
+def _analyze_mask_python(mask):
     """
-    Analyze table to find the dominant column structure.
+    Find a table's header row and per-column usage from its non-empty mask.
     
+    The header is the first row with at least half as many non-empty cells as
+    the most common count (among rows with 2+ cells); column usage counts the
+    non-empty cells of each column below it.
+    
+    Args:
+        mask: Boolean ndarray as returned by _build_mask
+        
     Returns:
-        Tuple of (header_row_index, columns_to_keep)
+        Tuple of (header_row_index, col_usage); header_row_index is -1 if no row
+        has 2+ non-empty cells
     """
-    if not table or len(table) < 2:
-        return 0, None
-    
-    # Analyze each row to find patterns
-    row_profiles = []
-    for i, row in enumerate(table):
-        non_empty = _count_non_empty_cells(row)
-        indices = _get_non_empty_indices(row)
-        row_profiles.append({
-            'index': i,
-            'non_empty': non_empty,
-            'indices': indices,
-            'total_cols': len(row)
-        })
+    # Non-empty cell count per row, kept as one array rather than a record per row
+    row_counts = mask.sum(axis=1)
     
     # Find the most common number of non-empty cells (excluding very sparse rows)
     # Lower threshold to 2 to catch more valid rows
-    non_empty_counts = [p['non_empty'] for p in row_profiles if p['non_empty'] >= 2]
+    non_empty_counts = row_counts[row_counts >= 2]
     
-    if not non_empty_counts:
-        # If no rows with 2+ cells, return first row as header and keep all columns
-        return 0, None
+    if not len(non_empty_counts):
+        return -1, np.zeros(mask.shape[1], dtype=np.int64)
     
-    # Find the mode (most common column count)
-    from collections import Counter
-    count_freq = Counter(non_empty_counts)
-    # Get the most common count that's reasonably high
-    if count_freq:
-        target_col_count = max(count_freq.keys(), key=lambda x: (count_freq[x], x))
-    else:
-        target_col_count = 3  # Default fallback
+    # Find the mode (most common column count); counts are small integers, so
+    # bincount replaces a Counter, and searching from the end prefers the
+    # larger count on ties
+    count_freq = np.bincount(non_empty_counts)
+    target_col_count = len(count_freq) - 1 - int(np.argmax(count_freq[::-1]))
     
-    # Find the first row that matches this structure (likely the header)
+    # Find the first row that matches this structure (likely the header);
+    # rows with the target count always qualify
     # Lower tolerance to 0.5 to be less strict
+    header_idx = int(np.argmax(row_counts >= max(2, target_col_count * 0.5)))
+    
+    return header_idx, _column_fill_counts(mask, header_idx + 1)
+
+
+def _analyze_mask_kernel(mask):
+    """Same as _analyze_mask_python, as explicit loops for numba to compile."""
+    n_rows, n_cols = mask.shape
+    row_counts = np.zeros(n_rows, dtype=np.int64)
+    for i in range(n_rows):
+        for j in range(n_cols):
+            if mask[i, j]:
+                row_counts[i] += 1
+    
+    # Most common count among rows with 2+ cells, preferring the larger count on ties
+    count_freq = np.zeros(n_cols + 1, dtype=np.int64)
+    for i in range(n_rows):
+        if row_counts[i] >= 2:
+            count_freq[row_counts[i]] += 1
+    target_col_count = -1
+    for count in range(2, n_cols + 1):
+        if count_freq[count] > 0 and (target_col_count < 0 or count_freq[count] >= count_freq[target_col_count]):
+            target_col_count = count
+    
+    col_usage = np.zeros(n_cols, dtype=np.int64)
+    if target_col_count < 0:
+        return -1, col_usage
+    
     header_idx = 0
-    for profile in row_profiles:
-        if profile['non_empty'] >= max(2, target_col_count * 0.5):  # Lower tolerance
-            header_idx = profile['index']
+    for i in range(n_rows):
+        if row_counts[i] >= max(2.0, target_col_count * 0.5):
+            header_idx = i
             break
     
+    for i in range(header_idx + 1, n_rows):
+        for j in range(n_cols):
+            if mask[i, j]:
+                col_usage[j] += 1
+    return header_idx, col_usage
+
+
+# Compile the analysis loops when numba is installed; it is optional
+if numba is not None:
+    _analyze_mask = numba.njit(cache=True)(_analyze_mask_kernel)
+else:
+    _analyze_mask = _analyze_mask_python
+
+
+def _find_table_structure(table, mask=None):
+    """
+    Analyze table to find the dominant column structure.
+    
+    Args:
+        table: List of rows (each row is a list of cells)
+        mask: The table's non-empty mask, if already built by _build_mask
+    
+    Returns:
+        Tuple of (header_row_index, columns_to_keep)
+    """
+    if not table or len(table) < 2:
+        return 0, None
+    
+    # Analyze each row to find patterns
+    if mask is None:
+        mask = _build_mask(table)
+    header_idx, col_usage = _analyze_mask(mask)
+    
+    if header_idx < 0:
+        # If no rows with 2+ cells, return first row as header and keep all columns
+        return 0, None
+    
     # Analyze data rows (after header) to find which columns are actually used
-    data_rows = table[header_idx + 1:] if header_idx + 1 < len(table) else []
+    n_data_rows = len(table) - header_idx - 1
     
-    if not data_rows:
+    if n_data_rows <= 0:
         return header_idx, None
     
-    # Count how often each column position has data
-    max_cols = max(len(row) for row in table)
-    col_usage = [0] * max_cols
-    
-    for row in data_rows:
-        for col_idx, cell in enumerate(row):
-            if cell is not None and str(cell).strip():
-                col_usage[col_idx] += 1
+    max_cols = mask.shape[1]
     
     # Lower threshold to 15% to be less aggressive
-    threshold = max(1, len(data_rows) * 0.15)
-    cols_to_keep = [i for i, usage in enumerate(col_usage) if usage >= threshold]
+    threshold = max(1, n_data_rows * 0.15)
+    keep = col_usage >= threshold
     
-    # Also include columns from the header row that have content
-    header_row = table[header_idx] if header_idx < len(table) else []
-    for i, cell in enumerate(header_row):
-        if cell is not None and str(cell).strip() and i not in cols_to_keep:
-            # Only add if this column has at least some data
-            if i < len(col_usage) and col_usage[i] > 0:
-                cols_to_keep.append(i)
+    # Also include columns from the header row that have content,
+    # but only if the column has at least some data
+    header_mask = mask[header_idx]
+    keep |= header_mask & (col_usage > 0)
     
     # If we filtered out too many columns (less than 3), keep more
-    if len(cols_to_keep) < 3 and max_cols > 3:
-        # Keep top columns by usage
-        col_usage_with_idx = [(usage, i) for i, usage in enumerate(col_usage)]
-        col_usage_with_idx.sort(reverse=True)
-        cols_to_keep = [i for _, i in col_usage_with_idx[:max(3, max_cols // 2)]]
+    if keep.sum() < 3 and max_cols > 3:
+        # Keep top columns by usage (ties go to the later column)
+        top = np.lexsort((np.arange(max_cols), col_usage))[::-1][:max(3, max_cols // 2)]
         # Also include header columns
-        for i, cell in enumerate(header_row):
-            if cell is not None and str(cell).strip() and i not in cols_to_keep:
-                cols_to_keep.append(i)
+        keep = header_mask.copy()
+        keep[top] = True
     
-    cols_to_keep = sorted(set(cols_to_keep))
+    return header_idx, np.flatnonzero(keep).tolist()
+
+
+def _object_array(rows, width):
+    """
+    Pack table rows into a 2D object array, padding short rows with None.
     
-    return header_idx, cols_to_keep
+    Args:
+        rows: List of rows (each row is a list of cells)
+        width: Number of columns; no row may be longer
+        
+    Returns:
+        Object ndarray of shape (rows, width)
+    """
+    # Filling a flat buffer with fromiter is much cheaper than np.array's
+    # nested-sequence discovery
+    padded = (row if len(row) == width else list(row) + [None] * (width - len(row)) for row in rows)
+    cells = np.fromiter(chain.from_iterable(padded), dtype=object, count=len(rows) * width)
+    return cells.reshape(len(rows), width)
 
 
 def _clean_table(table):
@@ -148,8 +254,10 @@ def _clean_table(table):
     if not table:
         return table
     
-    # Find the actual table structure
-    header_idx, cols_to_keep = _find_table_structure(table)
+    # Find the actual table structure; the cells are checked for content once
+    # and the mask serves the fallback below as well
+    mask = _build_mask(table)
+    header_idx, cols_to_keep = _find_table_structure(table, mask)
     
     # Use rows from header_idx onwards
     cleaned_table = table[header_idx:]
@@ -161,46 +269,262 @@ def _clean_table(table):
     if cols_to_keep is None or not cols_to_keep:
         # Fall back to keeping columns with at least some data
         num_rows = len(cleaned_table)
-        max_cols = max(len(row) for row in cleaned_table) if cleaned_table else 0
+        max_cols = mask.shape[1]
         
         if max_cols == 0:
             return cleaned_table
         
-        col_counts = [0] * max_cols
-        for row in cleaned_table:
-            for col_idx, cell in enumerate(row):
-                if cell is not None and str(cell).strip():
-                    col_counts[col_idx] += 1
+        col_counts = _column_fill_counts(mask, header_idx)
         
         # Lower threshold to 20% fill rate
         threshold = max(1, num_rows * 0.2)
-        cols_to_keep = [i for i, count in enumerate(col_counts) if count >= threshold]
+        cols_to_keep = np.flatnonzero(col_counts >= threshold).tolist()
         
         # If still no columns, keep at least the first few columns that have any data
         if not cols_to_keep:
-            cols_to_keep = [i for i, count in enumerate(col_counts) if count > 0]
-            # Limit to reasonable number (max 20 columns)
+            cols_to_keep = np.flatnonzero(col_counts > 0).tolist()
+            # Limit to reasonable number (max 20 columns), fullest first
+            # (ties go to the later column)
             if len(cols_to_keep) > 20:
-                cols_with_counts = [(col_counts[i], i) for i in cols_to_keep]
-                cols_with_counts.sort(reverse=True)
-                cols_to_keep = [i for _, i in cols_with_counts[:20]]
+                cols_to_keep = np.lexsort((np.arange(max_cols), col_counts))[::-1][:20].tolist()
     
     if not cols_to_keep:
         # Last resort: return original table if we can't determine columns
         return cleaned_table
     
-    # Filter to keep only the identified columns
-    result = []
-    for row in cleaned_table:
-        new_row = []
-        for col_idx in cols_to_keep:
-            if col_idx < len(row):
-                new_row.append(row[col_idx])
-            else:
-                new_row.append(None)
-        result.append(new_row)
+    # Filter to keep only the identified columns; cells missing from short
+    # rows come out as None. Columns may come from rows above the header, so
+    # the array is padded out to the widest kept column as well
+    cols_to_keep = np.asarray(cols_to_keep, dtype=np.intp)
+    width = max(max(len(row) for row in cleaned_table), int(cols_to_keep.max()) + 1)
+    return _object_array(cleaned_table, width)[:, cols_to_keep].tolist()
+
+
+def _rows_to_frame(rows, columns):
+    """
+    Build a DataFrame from table rows through a 2D object array.
     
-    return result
+    Handing pandas one ndarray avoids its row-by-row list inference.
+    
+    Args:
+        rows: List of rows (each row is a list of cells)
+        columns: Column names
+        
+    Returns:
+        pd.DataFrame: Rows shorter than the longest row are padded with None
+        
+    Raises:
+        ValueError: If the longest row does not match the number of columns,
+                    as with pd.DataFrame(rows, columns=columns)
+    """
+    width = max((len(row) for row in rows), default=0)
+    if width != len(columns):
+        raise ValueError(f"{len(columns)} columns passed, passed data had {width} columns")
+    
+    return pd.DataFrame(_object_array(rows, width), columns=columns, copy=False)
+
+
+def _drop_all_empty(df):
+    """
+    Drop the rows and the columns of a DataFrame that hold no values at all.
+    
+    Same result as dropna(how='all') followed by dropna(axis=1, how='all'),
+    from a single missing-value scan: a dropped row holds no values, so it
+    cannot keep a column alive.
+    """
+    present = df.notna().to_numpy()
+    return df.loc[present.any(axis=1), present.any(axis=0)]
+
+
+@contextmanager
+def _open_pdf(file_bytes: bytes):
+    """Open an in-memory PDF."""
+    # Create BytesIO wrapper for in-memory PDF processing
+    with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
+        yield pdf
+
+
+@contextmanager
+def _open_pdf_path(path: str):
+    """Open a PDF on disk through a read-only memory map."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with pdfplumber.open(mm) as pdf:
+                yield pdf
+
+
+# Table detection settings, resolved once: precise ruled-line detection, and a
+# text-alignment fallback for tables drawn without lines
+_LINES_TABLE_SETTINGS = TableSettings.resolve({
+    "vertical_strategy": "lines",
+    "horizontal_strategy": "lines",
+    "snap_tolerance": 3,
+    "join_tolerance": 3,
+})
+_TEXT_TABLE_SETTINGS = TableSettings.resolve({
+    "vertical_strategy": "text",
+    "horizontal_strategy": "text",
+})
+
+
+def _extract_page_tables(page) -> list:
+    """
+    Extract the tables of a page, trying ruled lines first and text alignment second.
+    
+    Same result as page.extract_tables() with each setting in turn, but the
+    lines strategy is skipped on pages without any edges, where it cannot
+    find a table, and only the tables that were found are extracted.
+    
+    Args:
+        page: pdfplumber Page
+        
+    Returns:
+        List of tables (each a list of rows)
+    """
+    settings = _LINES_TABLE_SETTINGS
+    found = page.find_tables(settings) if page.edges else []
+    
+    # If no tables found with strict settings, try with text strategy
+    if not found:
+        settings = _TEXT_TABLE_SETTINGS
+        found = page.find_tables(settings)
+    
+    return [table.extract(**settings.text_settings) for table in found]
+
+
+# Number of per-table frames concatenated into one partial frame at a time
+_CONCAT_CHUNK = 32
+
+
+def _concat_chunk(frames: list) -> pd.DataFrame:
+    """Concatenate consecutive per-table frames, keeping columns in order of appearance."""
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True, axis=0, join='outer')
+
+
+def _collect_tables(pdf, start: int = 0, stop: int | None = None) -> list:
+    """
+    Extract and clean every table of an open PDF, or of a range of its pages.
+    
+    Args:
+        pdf: Open pdfplumber PDF
+        start: Index of the first page to process
+        stop: Index one past the last page to process (None for the last page)
+        
+    Returns:
+        List of DataFrames in page order, each concatenating up to about
+        _CONCAT_CHUNK consecutive tables
+    """
+    partials = []
+    all_tables = []
+    
+    # Iterate through the pages in range
+    for page in pdf.pages[start:stop]:
+        # Pages without characters or ruling lines (blank or image-only) cannot hold a table
+        if not page.chars and not page.edges:
+            continue
+        
+        tables = _extract_page_tables(page)
+        
+        if tables:
+            # Convert each table to a DataFrame
+            for table in tables:
+                if table and len(table) > 0:
+                    try:
+                        # Clean the table (remove graphical header artifacts)
+                        cleaned = _clean_table(table)
+                        
+                        # Ensure we have a valid cleaned table
+                        if not cleaned or len(cleaned) == 0:
+                            # Fallback to original table if cleaning removed everything
+                            cleaned = table
+                        
+                        if cleaned and len(cleaned) > 1:
+                            # First row as headers
+                            columns = _make_unique_columns(cleaned[0])
+                            df = _rows_to_frame(cleaned[1:], columns)
+                            
+                            # Remove rows and columns that are completely empty
+                            df = _drop_all_empty(df)
+                            
+                            # Only add if we have at least some data
+                            if not df.empty and len(df.columns) > 0:
+                                all_tables.append(df)
+                        elif cleaned and len(cleaned) == 1:
+                            # Only header row
+                            columns = _make_unique_columns(cleaned[0])
+                            # Filter out empty column names
+                            columns = [c for c in columns if c and str(c).strip()]
+                            if len(columns) > 0:
+                                df = pd.DataFrame(columns=columns)
+                                all_tables.append(df)
+                    except Exception as e:
+                        # If cleaning fails, try to use original table
+                        try:
+                            if len(table) > 1:
+                                columns = _make_unique_columns(table[0])
+                                df = _rows_to_frame(table[1:], columns)
+                                df = _drop_all_empty(df)
+                                if not df.empty:
+                                    all_tables.append(df)
+                        except:
+                            # Skip this table if we can't process it
+                            pass
+        
+        # Fold finished tables into one frame per chunk, so only a few
+        # partial frames stay alive on long documents
+        if len(all_tables) >= _CONCAT_CHUNK:
+            partials.append(_concat_chunk(all_tables))
+            all_tables = []
+    
+    if all_tables:
+        partials.append(_concat_chunk(all_tables))
+    return partials
+
+
+def merge_tables(all_tables: list) -> pd.DataFrame:
+    """
+    Merge table DataFrames into one and drop mostly empty columns.
+    
+    Args:
+        all_tables: List of DataFrames as returned by table_frames_path, in page order
+        
+    Returns:
+        pd.DataFrame: Merged DataFrame, or an empty DataFrame if there are no tables
+    """
+    # Merge all tables into a single DataFrame
+    if all_tables:
+        # Use axis=0 concatenation with join='outer' to handle different columns
+        merged_df = pd.concat(all_tables, ignore_index=True, axis=0, join='outer')
+        
+        # Final cleanup: remove columns that are mostly empty
+        # Lower threshold to 20% to be less aggressive
+        threshold = len(merged_df) * 0.2
+        present = merged_df.notna()
+        cols_to_drop = (present.sum() < max(1, int(threshold))).to_numpy(copy=True)
+        
+        # Also remove columns that have only empty strings; only the columns still
+        # kept are checked, in one pass over their underlying object array
+        kept = np.flatnonzero(~cols_to_drop)
+        non_empty_counts = np.zeros(len(cols_to_drop), dtype=np.int64)
+        if len(kept):
+            cells = merged_df.iloc[:, kept].to_numpy(dtype=object)
+            non_empty = _build_mask(cells.tolist()) & present.to_numpy()[:, kept]
+            non_empty_counts[kept] = non_empty.sum(axis=0)
+        cols_to_drop |= non_empty_counts == 0
+        
+        # Remove columns with empty or whitespace-only names if they have little data
+        blank_names = np.array([str(col).strip() in ('', 'None') for col in merged_df.columns], dtype=bool)
+        cols_to_drop |= blank_names & (non_empty_counts < len(merged_df) * 0.3)
+        
+        # Drop all of them at once, rebuilding the frame a single time
+        merged_df = merged_df.loc[:, ~cols_to_drop]
+        
+        return merged_df
+    else:
+        # Return empty DataFrame if no tables found
+        return pd.DataFrame()
 
 
 def tables_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
@@ -224,115 +548,110 @@ def tables_to_dataframe(file_bytes: bytes) -> pd.DataFrame:
     if len(file_bytes) == 0:
         raise ValueError("PDF file is empty")
     
-    # Create BytesIO wrapper for in-memory PDF processing
-    pdf_stream = io.BytesIO(file_bytes)
+    try:
+        with _open_pdf(file_bytes) as pdf:
+            all_tables = _collect_tables(pdf)
     
-    all_tables = []
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
+    
+    return merge_tables(all_tables)
+
+
+def tables_to_dataframe_path(path: str) -> pd.DataFrame:
+    """
+    Extract all tables from a PDF file on disk and merge them into a single DataFrame.
+    
+    The file is memory-mapped instead of read into memory, so a worker process
+    only needs the path and the OS pages in the parts pdfplumber touches.
+    
+    Args:
+        path: Path to the PDF file
+        
+    Returns:
+        pd.DataFrame: A single merged DataFrame containing all tables from all pages.
+                     Returns an empty DataFrame if no tables are found.
+        
+    Raises:
+        ValueError: If the PDF file is empty
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("PDF file is empty")
     
     try:
-        with pdfplumber.open(pdf_stream) as pdf:
-            # Iterate through all pages
-            for page in pdf.pages:
-                # Extract tables from current page with table settings
-                # Use more precise table detection
-                tables = page.extract_tables(table_settings={
-                    "vertical_strategy": "lines",
-                    "horizontal_strategy": "lines",
-                    "snap_tolerance": 3,
-                    "join_tolerance": 3,
-                })
-                
-                # If no tables found with strict settings, try with text strategy
-                if not tables:
-                    tables = page.extract_tables(table_settings={
-                        "vertical_strategy": "text",
-                        "horizontal_strategy": "text",
-                    })
-                
-                if tables:
-                    # Convert each table to a DataFrame
-                    for table in tables:
-                        if table and len(table) > 0:
-                            try:
-                                # Clean the table (remove graphical header artifacts)
-                                cleaned = _clean_table(table)
-                                
-                                # Ensure we have a valid cleaned table
-                                if not cleaned or len(cleaned) == 0:
-                                    # Fallback to original table if cleaning removed everything
-                                    cleaned = table
-                                
-                                if cleaned and len(cleaned) > 1:
-                                    # First row as headers
-                                    columns = _make_unique_columns(cleaned[0])
-                                    df = pd.DataFrame(cleaned[1:], columns=columns)
-                                    
-                                    # Remove rows that are completely empty
-                                    df = df.dropna(how='all')
-                                    
-                                    # Remove columns that are completely empty
-                                    df = df.dropna(axis=1, how='all')
-                                    
-                                    # Only add if we have at least some data
-                                    if not df.empty and len(df.columns) > 0:
-                                        all_tables.append(df)
-                                elif cleaned and len(cleaned) == 1:
-                                    # Only header row
-                                    columns = _make_unique_columns(cleaned[0])
-                                    # Filter out empty column names
-                                    columns = [c for c in columns if c and str(c).strip()]
-                                    if len(columns) > 0:
-                                        df = pd.DataFrame(columns=columns)
-                                        all_tables.append(df)
-                            except Exception as e:
-                                # If cleaning fails, try to use original table
-                                try:
-                                    if len(table) > 1:
-                                        columns = _make_unique_columns(table[0])
-                                        df = pd.DataFrame(table[1:], columns=columns)
-                                        df = df.dropna(how='all')
-                                        df = df.dropna(axis=1, how='all')
-                                        if not df.empty:
-                                            all_tables.append(df)
-                                except:
-                                    # Skip this table if we can't process it
-                                    pass
+        with _open_pdf_path(path) as pdf:
+            all_tables = _collect_tables(pdf)
     
     except Exception as e:
         raise Exception(f"Error processing PDF: {str(e)}")
     
-    # Merge all tables into a single DataFrame
-    if all_tables:
-        # Use axis=0 concatenation with join='outer' to handle different columns
-        merged_df = pd.concat(all_tables, ignore_index=True, axis=0, join='outer')
+    return merge_tables(all_tables)
+
+
+def _write_text_pages(pdf, out, start: int = 0, stop: int | None = None) -> bool:
+    """
+    Write the formatted text of every page of an open PDF, or of a range of its pages.
+    
+    Pages are separated by a blank line; pages without text are skipped.
+    
+    Args:
+        pdf: Open pdfplumber PDF
+        out: Text buffer the formatted pages are written to
+        start: Index of the first page to process
+        stop: Index one past the last page to process (None for the last page)
         
-        # Final cleanup: remove columns that are mostly empty
-        # Lower threshold to 20% to be less aggressive
-        threshold = len(merged_df) * 0.2
-        merged_df = merged_df.dropna(axis=1, thresh=max(1, int(threshold)))
+    Returns:
+        bool: True if at least one page had text
+    """
+    wrote = False
+    total_pages = len(pdf.pages)
+    
+    # Iterate through the pages in range
+    for page_num, page in enumerate(pdf.pages[start:stop], start + 1):
+        # Blank and image-only pages have no characters to lay out
+        if not page.chars:
+            continue
         
-        # Also remove columns that have only empty strings
-        for col in merged_df.columns:
-            if merged_df[col].apply(lambda x: str(x).strip() if pd.notna(x) else '').eq('').all():
-                merged_df = merged_df.drop(columns=[col])
+        # Extract text from current page
+        page_text = page.extract_text()
         
-        # Remove columns with empty or whitespace-only names if they have little data
-        cols_to_drop = []
-        for col in merged_df.columns:
-            col_str = str(col).strip()
-            if col_str == '' or col_str == 'None':
-                # Check if this column has meaningful data
-                non_empty = merged_df[col].apply(lambda x: bool(str(x).strip()) if pd.notna(x) else False).sum()
-                if non_empty < len(merged_df) * 0.3:
-                    cols_to_drop.append(col)
-        
-        if cols_to_drop:
-            merged_df = merged_df.drop(columns=cols_to_drop)
+        if page_text:
+            if wrote:
+                out.write("\n\n")
+            # Clean and format the text
+            _format_text(page_text, page_num, total_pages, out)
+            wrote = True
+    
+    return wrote
+
+
+def join_text_pages(chunks: list) -> str:
+    """
+    Join the formatted texts of consecutive page ranges into the document text.
+    
+    Args:
+        chunks: Range texts as returned by text_pages_path, in page order
         
-        return merged_df
-    else:
-        # Return empty DataFrame if no tables found
-        return pd.DataFrame()
+    Returns:
+        str: Formatted text content from all pages
+    """
+    return "\n\n".join(chunk for chunk in chunks if chunk is not None)
+
+
+def _collect_text(pdf) -> str:
+    """
+    Extract and format the text of every page of an open PDF.
+    
+    Args:
+        pdf: Open pdfplumber PDF
+        
+    Returns:
+        str: Formatted text content from all pages
+    """
+    buf = io.StringIO()
+    _write_text_pages(pdf, buf)
+    return buf.getvalue()
 
 
 def extract_text_from_pdf(file_bytes: bytes) -> str:
@@ -355,30 +674,158 @@ def extract_text_from_pdf(file_bytes: bytes) -> str:
     if len(file_bytes) == 0:
         raise ValueError("PDF file is empty")
     
-    # Create BytesIO wrapper for in-memory PDF processing
-    pdf_stream = io.BytesIO(file_bytes)
+    try:
+        with _open_pdf(file_bytes) as pdf:
+            return _collect_text(pdf)
+    
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
+
+
+def extract_text_from_pdf_path(path: str) -> str:
+    """
+    Extract all text from a PDF file on disk and format it nicely.
+    
+    Like tables_to_dataframe_path, the file is memory-mapped rather than read.
+    
+    Args:
+        path: Path to the PDF file
+        
+    Returns:
+        str: Formatted text content from all pages
+        
+    Raises:
+        ValueError: If the PDF file is empty
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("PDF file is empty")
+    
+    try:
+        with _open_pdf_path(path) as pdf:
+            return _collect_text(pdf)
+    
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
+
+
+def extract_all(file_bytes: bytes) -> tuple:
+    """
+    Extract both the tables and the text of a PDF file, parsing it only once.
+    
+    Same results as tables_to_dataframe and extract_text_from_pdf, but both
+    passes share one open document, so the file structure, fonts and page
+    contents are parsed a single time.
+    
+    Args:
+        file_bytes: PDF file content as bytes
+        
+    Returns:
+        tuple: (pd.DataFrame of all tables, str of formatted text)
+        
+    Raises:
+        ValueError: If the PDF file is empty or invalid
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    if not file_bytes:
+        raise ValueError("PDF file bytes cannot be empty")
+    
+    try:
+        with _open_pdf(file_bytes) as pdf:
+            all_tables = _collect_tables(pdf)
+            text = _collect_text(pdf)
     
-    all_text = []
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
+    
+    return merge_tables(all_tables), text
+
+
+def count_pages_path(path: str) -> int:
+    """
+    Count the pages of a PDF file on disk.
+    
+    Args:
+        path: Path to the PDF file
+        
+    Returns:
+        int: Number of pages
+        
+    Raises:
+        ValueError: If the PDF file is empty
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    if os.path.getsize(path) == 0:
+        raise ValueError("PDF file is empty")
     
     try:
-        with pdfplumber.open(pdf_stream) as pdf:
-            # Iterate through all pages
-            for page_num, page in enumerate(pdf.pages, 1):
-                # Extract text from current page
-                page_text = page.extract_text()
-                
-                if page_text:
-                    # Clean and format the text
-                    cleaned_text = _format_text(page_text, page_num, len(pdf.pages))
-                    all_text.append(cleaned_text)
+        with _open_pdf_path(path) as pdf:
+            return len(pdf.pages)
     
     except Exception as e:
         raise Exception(f"Error processing PDF: {str(e)}")
+
+
+def table_frames_path(path: str, start: int, stop: int) -> list:
+    """
+    Extract the tables of a range of pages of a PDF file on disk.
+    
+    Page ranges can be processed in separate workers; merge_tables on the
+    concatenated results gives the same DataFrame as tables_to_dataframe_path.
+    
+    Args:
+        path: Path to the PDF file
+        start: Index of the first page to process
+        stop: Index one past the last page to process
+        
+    Returns:
+        List of DataFrames of consecutive tables, in page order
+        
+    Raises:
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    try:
+        with _open_pdf_path(path) as pdf:
+            return _collect_tables(pdf, start, stop)
     
-    return "\n\n".join(all_text)
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
 
 
-def _format_text(text: str, page_num: int, total_pages: int) -> str:
+def text_pages_path(path: str, start: int, stop: int) -> str | None:
+    """
+    Extract the formatted text of a range of pages of a PDF file on disk.
+    
+    Page ranges can be processed in separate workers; join_text_pages on the
+    results, in page order, gives the same text as extract_text_from_pdf_path.
+    
+    Args:
+        path: Path to the PDF file
+        start: Index of the first page to process
+        stop: Index one past the last page to process
+        
+    Returns:
+        Formatted text of the range, or None if none of its pages has text
+        
+    Raises:
+        Exception: If the PDF file is corrupted or cannot be processed
+    """
+    try:
+        buf = io.StringIO()
+        with _open_pdf_path(path) as pdf:
+            wrote = _write_text_pages(pdf, buf, start, stop)
+        return buf.getvalue() if wrote else None
+    
+    except Exception as e:
+        raise Exception(f"Error processing PDF: {str(e)}")
+
+
+# Whitespace patterns applied to every page's text
+_RE_MULTI_NL = re.compile(r'\n{3,}')
+_RE_SPACES = re.compile(r'[ \t]+')
+
+
+def _format_text(text: str, page_num: int, total_pages: int, out) -> None:
     """
     Format extracted text nicely.
     
@@ -386,16 +833,14 @@ def _format_text(text: str, page_num: int, total_pages: int) -> str:
         text: Raw text from PDF page
         page_num: Current page number
         total_pages: Total number of pages
-        
-    Returns:
-        Formatted text string
+        out: Text buffer the formatted text is written to
     """
     if not text:
-        return ""
+        return
     
     # Remove excessive whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text)  # Max 2 consecutive newlines
-    text = re.sub(r'[ \t]+', ' ', text)  # Normalize spaces
+    text = _RE_MULTI_NL.sub('\n\n', text)  # Max 2 consecutive newlines
+    text = _RE_SPACES.sub(' ', text)  # Normalize spaces
     
     # Add page separator if multiple pages
     if total_pages > 1:
@@ -403,29 +848,103 @@ def _format_text(text: str, page_num: int, total_pages: int) -> str:
         text = header + text
     
     # Clean up line breaks
-    lines = text.split('\n')
-    formatted_lines = []
+    started = False
+    previous_blank = True
     
-    for line in lines:
+    for line in text.split('\n'):
         line = line.strip()
         if line:
-            formatted_lines.append(line)
-        elif formatted_lines and formatted_lines[-1]:  # Add blank line only if previous line wasn't blank
-            formatted_lines.append('')
+            if started:
+                out.write('\n')
+            out.write(line)
+            started = True
+            previous_blank = False
+        elif not previous_blank:  # Add blank line only if previous line wasn't blank
+            out.write('\n')
+            previous_blank = True
+
+
+# Largest sheet an .xlsx file can hold
+_EXCEL_MAX_ROWS = 1048576
+_EXCEL_MAX_COLS = 16384
+
+
+# xlsxwriter's return code for a string cut to Excel's 32767-character cell limit
+_XLSX_STRING_TRUNCATED = -2
+
+
+def _write_excel_row(worksheet, row_num: int, row: list, cell_format=None) -> None:
+    """
+    Write one row of cells to an xlsxwriter worksheet.
+    
+    write_row stops at the first cell that returns an error, so a row it did not
+    finish is written again cell by cell. A string longer than an Excel cell
+    can hold is kept cut to 32767 characters; any other error is raised.
+    
+    Args:
+        worksheet: xlsxwriter Worksheet
+        row_num: Index of the row
+        row: Cell values
+        cell_format: Optional xlsxwriter Format for every cell
+        
+    Raises:
+        ValueError: If a cell cannot be written
+    """
+    if not worksheet.write_row(row_num, 0, row, cell_format):
+        return
     
-    return '\n'.join(formatted_lines)
+    for col_num, cell in enumerate(row):
+        error = worksheet.write(row_num, col_num, cell, cell_format)
+        if error and error != _XLSX_STRING_TRUNCATED:
+            raise ValueError(f"Could not write cell ({row_num}, {col_num}) to Excel (error {error})")
 
 
-def convert_to_format(df: pd.DataFrame, output_format: str) -> io.BytesIO:
+def _write_excel(df: pd.DataFrame, output_stream) -> None:
+    """
+    Write a DataFrame as an Excel workbook using xlsxwriter in constant-memory mode.
+    
+    Constant-memory mode flushes each row as soon as the next one is started, so
+    rows are written in order here; pandas' to_excel writes column by column,
+    which that mode cannot handle.
+    
+    Args:
+        df: Pandas DataFrame to write
+        output_stream: Binary stream to write the workbook into
+        
+    Raises:
+        ValueError: If the DataFrame does not fit on one sheet, or a cell cannot be written
+    """
+    if len(df) + 1 > _EXCEL_MAX_ROWS or len(df.columns) > _EXCEL_MAX_COLS:
+        raise ValueError(f"This sheet is too large! Your sheet size is: {len(df) + 1}, {len(df.columns)}")
+    
+    # Cells are written as they are: URL-like strings stay plain text, as with openpyxl
+    workbook = xlsxwriter.Workbook(output_stream, {'constant_memory': True, 'strings_to_urls': False})
+    worksheet = workbook.add_worksheet('Sheet1')
+    
+    # Same header style as pandas' to_excel
+    header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+    _write_excel_row(worksheet, 0, [str(col) for col in df.columns], header_format)
+    
+    # Missing cells become None, which xlsxwriter leaves empty
+    rows = df.to_numpy(dtype=object, na_value=None).tolist()
+    for row_num, row in enumerate(rows, 1):
+        _write_excel_row(worksheet, row_num, row)
+    
+    workbook.close()
+
+
+def convert_to_format(df: pd.DataFrame, output_format: str, output_stream=None) -> io.BytesIO:
     """
     Convert a Pandas DataFrame to the specified format (CSV or Excel).
     
     Args:
         df: Pandas DataFrame to convert
         output_format: Output format, either 'csv' or 'excel'
+        output_stream: Seekable binary stream to write into, such as an open file;
+                       a new BytesIO is used if omitted
         
     Returns:
-        io.BytesIO: BytesIO stream containing the formatted data
+        io.BytesIO: The stream containing the formatted data
         
     Raises:
         ValueError: If output_format is not 'csv' or 'excel'
@@ -434,23 +953,26 @@ def convert_to_format(df: pd.DataFrame, output_format: str) -> io.BytesIO:
     if output_format not in ['csv', 'excel']:
         raise ValueError(f"Invalid output_format: {output_format}. Must be 'csv' or 'excel'")
     
-    if df.empty:
-        # Return empty BytesIO for empty DataFrames
-        return io.BytesIO()
+    if output_stream is None:
+        output_stream = io.BytesIO()
     
-    output_stream = io.BytesIO()
+    if df.empty:
+        # Return the empty stream for empty DataFrames
+        return output_stream
     
     try:
         if output_format == 'csv':
-            # Convert DataFrame to CSV
-            csv_string = df.to_csv(index=False)
-            output_stream.write(csv_string.encode('utf-8'))
+            # Write the CSV straight into the stream
+            df.to_csv(output_stream, index=False, encoding='utf-8')
             output_stream.seek(0)  # Reset stream position to beginning
             
         elif output_format == 'excel':
-            # Convert DataFrame to Excel using openpyxl engine
-            with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Sheet1')
+            if xlsxwriter is not None:
+                _write_excel(df, output_stream)
+            else:
+                # Convert DataFrame to Excel using openpyxl engine
+                with pd.ExcelWriter(output_stream, engine='openpyxl') as writer:
+                    df.to_excel(writer, index=False, sheet_name='Sheet1')
             output_stream.seek(0)  # Reset stream position to beginning
             
     except Exception as e:
@@ -459,29 +981,36 @@ def convert_to_format(df: pd.DataFrame, output_format: str) -> io.BytesIO:
     return output_stream
 
 
-def convert_text_to_format(text: str, output_format: str) -> io.BytesIO:
+def convert_text_to_format(text: str, output_format: str, output_stream=None) -> io.BytesIO:
     """
     Convert extracted text to the specified format (TXT or DOCX).
     
     Args:
         text: Text content to convert
         output_format: Output format, either 'txt' or 'docx'
+        output_stream: Seekable binary stream to write into, such as an open file;
+                       a new BytesIO is used if omitted
         
     Returns:
-        io.BytesIO: BytesIO stream containing the formatted data
+        io.BytesIO: The stream containing the formatted data
         
     Raises:
         ValueError: If output_format is not 'txt' or 'docx'
+        ImportError: If 'docx' is requested and python-docx is not installed
         Exception: If conversion fails
     """
     if output_format not in ['txt', 'docx']:
         raise ValueError(f"Invalid output_format: {output_format}. Must be 'txt' or 'docx'")
     
-    if not text or not text.strip():
-        # Return empty BytesIO for empty text
-        return io.BytesIO()
+    if output_format == 'docx' and Document is None:
+        raise ImportError("DOCX export requires python-docx (pip install python-docx)")
     
-    output_stream = io.BytesIO()
+    if output_stream is None:
+        output_stream = io.BytesIO()
+    
+    if not text or not text.strip():
+        # Return the empty stream for empty text
+        return output_stream
     
     try:
         if output_format == 'txt':
@@ -491,9 +1020,6 @@ def convert_text_to_format(text: str, output_format: str) -> io.BytesIO:
             
         elif output_format == 'docx':
             # Convert text to DOCX using python-docx
-            from docx import Document
-            from docx.shared import Pt
-            
             doc = Document()
             
             # Set default font
@@ -521,7 +1047,7 @@ def convert_text_to_format(text: str, output_format: str) -> io.BytesIO:
                                     if len(line.strip()) < 100 and not line.strip().endswith('.'):
                                         p.style = 'Heading 2'
             
-            # Save to BytesIO
+            # Save to the output stream
             doc.save(output_stream)
             output_stream.seek(0)  # Reset stream position to beginning
             